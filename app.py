@@ -1,8 +1,13 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+import altair as alt
 import numpy as np
+import hashlib
+import os
+import tempfile
 from datetime import date
+from pathlib import Path
 
 # Page setup
 st.set_page_config(page_title="SeaFreight360", layout="wide")
@@ -18,6 +23,11 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Reference dates, computed once per rerun
+TODAY = pd.Timestamp(date.today())
+TODAY_PLUS_3 = TODAY + pd.Timedelta(days=3)
+TODAY_PLUS_7 = TODAY + pd.Timedelta(days=7)
+
 # ---------- DATA UPLOAD (must be BEFORE the loader call) ----------
 with st.sidebar:
     st.subheader("Upload your own CSVs (optional)")
@@ -27,36 +37,109 @@ with st.sidebar:
     up_cli  = st.file_uploader("Clients CSV",   type="csv", key="u_cli")
 
 # ---------- DATA ----------
+# the bundled CSVs use ISO dates; an explicit format skips pandas' per-element dateutil fallback
+DATE_FORMAT = "%Y-%m-%d"
+
+# text columns load as Arrow-backed strings: no object arrays, no astype(str) later
+STR = "string[pyarrow]"
+
+SHIPMENT_DTYPES = {
+    "Origin_Port": "category",
+    "Destination_Port": "category",
+    "Container_ID": STR,
+    "Vessel": STR,
+    "Status": STR,
+}
+INVOICE_DTYPES   = {"Invoice_ID": STR, "Container_ID": STR, "Paid_Status": STR}
+WAREHOUSE_DTYPES = {"Material_ID": STR, "Description": STR, "Location": STR}
+CLIENT_DTYPES    = {"Client_ID": STR, "Name": STR, "Delivery_Address": STR, "Status": STR}
+
+# typed Parquet copies of the bundled CSVs, reused across cold starts
+PARQUET_CACHE = Path("data/.cache")
+
+def _read_csv(upload, path, parse_dates, dtype=None):
+    if upload:
+        # uploads may use any date format: let pandas infer it, and coerce
+        # whatever it could not parse so datetime-only code downstream still works
+        df = pd.read_csv(upload, parse_dates=parse_dates, dtype=dtype)
+        for col in parse_dates:
+            if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], errors="coerce")
+        return df
+
+    # fall back to /data/*.csv if no upload provided, via Parquet while it is fresh.
+    # The filename carries a tag of the parse settings, so changing dtypes or the
+    # date format never serves a copy written under the old schema.
+    tag = hashlib.sha1(repr((parse_dates, dtype, DATE_FORMAT)).encode()).hexdigest()[:8]
+    cached = PARQUET_CACHE / f"{Path(path).stem}-{tag}.parquet"
+    if cached.exists() and cached.stat().st_mtime >= Path(path).stat().st_mtime:
+        try:
+            # pandas rebuilds "string" columns with the default (python) storage;
+            # ask for pyarrow so the cached frame matches the CSV dtypes exactly
+            with pd.option_context("mode.string_storage", "pyarrow"):
+                return pd.read_parquet(cached, engine="pyarrow")
+        except (OSError, ValueError):
+            pass  # unreadable cache file: re-parse the CSV and rewrite it
+
+    df = pd.read_csv(path, parse_dates=parse_dates, date_format=DATE_FORMAT, dtype=dtype)
+    try:
+        PARQUET_CACHE.mkdir(parents=True, exist_ok=True)
+        # write to a temp file and swap it in, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=PARQUET_CACHE, suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp, engine="pyarrow", compression="zstd")
+            os.chmod(tmp, 0o644)  # mkstemp creates 0600; let other service users read it
+            os.replace(tmp, cached)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        # drop copies written under older parse settings
+        for stale in PARQUET_CACHE.glob(f"{Path(path).stem}-*.parquet"):
+            if stale != cached:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        pass  # read-only checkout: keep serving from CSV
+    return df
+
 @st.cache_data
-def load_data_from_uploads(up_ship, up_inv, up_wh, up_cli):
-    # fall back to /data/*.csv if no upload provided
-    shipments = pd.read_csv(up_ship, parse_dates=["ETA"]) if up_ship else \
-                pd.read_csv("data/shipments.csv", parse_dates=["ETA"])
-    invoices  = pd.read_csv(up_inv,  parse_dates=["Due_Date","Payment_Date"]) if up_inv else \
-                pd.read_csv("data/invoices.csv",  parse_dates=["Due_Date","Payment_Date"])
-    warehouse = pd.read_csv(up_wh,   parse_dates=["Inbound_Date","Outbound_Date"]) if up_wh else \
-                pd.read_csv("data/warehouse.csv", parse_dates=["Inbound_Date","Outbound_Date"])
-    clients   = pd.read_csv(up_cli,  parse_dates=["Pickup_Date"]) if up_cli else \
-                pd.read_csv("data/clients.csv",   parse_dates=["Pickup_Date"])
+def _load_raw(up_ship, up_inv, up_wh, up_cli):
+    shipments = _read_csv(up_ship, "data/shipments.csv", ["ETA"], dtype=SHIPMENT_DTYPES)
+    invoices  = _read_csv(up_inv,  "data/invoices.csv",  ["Due_Date","Payment_Date"], dtype=INVOICE_DTYPES)
+    warehouse = _read_csv(up_wh,   "data/warehouse.csv", ["Inbound_Date","Outbound_Date"], dtype=WAREHOUSE_DTYPES)
+    clients   = _read_csv(up_cli,  "data/clients.csv",   ["Pickup_Date"], dtype=CLIENT_DTYPES)
+    return shipments, invoices, warehouse, clients
+
+NS_PER_DAY = 86_400 * 10**9
+NAT_I8 = np.iinfo(np.int64).min  # NaT as int64 nanoseconds
+
+def _simulate_delivery(eta_ns, delivered, seed=42):
+    # simulated delivery: 75% on ETA, the rest 1-5 days late; writes int64 ns
+    # directly (NaT where not delivered) and On_Time as 1.0/0.0/NaN
+    rng = np.random.default_rng(seed)
+    idx = np.flatnonzero(delivered)
+    on_time_flag = rng.random(idx.size) < 0.75
+    delays = rng.integers(1, 6, size=idx.size)
+
+    has_eta = eta_ns[idx] != NAT_I8
+    out = np.full(eta_ns.shape, NAT_I8, dtype=np.int64)
+    out[idx[has_eta]] = eta_ns[idx[has_eta]] + np.where(on_time_flag, 0, delays)[has_eta] * NS_PER_DAY
+    on_time = np.full(eta_ns.shape, np.nan)
+    on_time[idx] = on_time_flag & has_eta
+    return out, on_time
+
+@st.cache_data
+def _enrich(shipments, invoices, warehouse, clients, today):
+    # lowercase status, normalized once; downstream checks compare category codes
+    if "Status" in shipments.columns:
+        shipments["_Status_lc"] = shipments["Status"].str.lower().astype("category")
 
     # ----- SLA: Delivered_Date & On-Time (simulated) -----
-    if {"Status","ETA"}.issubset(shipments.columns):
-        delivered_mask = shipments["Status"].astype(str).str.lower().eq("delivered")
-        rng = np.random.default_rng(42)
-        on_time_flag = rng.random(delivered_mask.sum()) < 0.75
-        delays = rng.integers(1, 6, size=delivered_mask.sum())
-
-        delivered_dates, idx = [], 0
-        for is_delivered in delivered_mask:
-            if is_delivered:
-                base_eta = shipments.iloc[idx]["ETA"]
-                delivered_dates.append(base_eta if on_time_flag[idx] else base_eta + pd.Timedelta(days=int(delays[idx])))
-                idx += 1
-            else:
-                delivered_dates.append(pd.NaT)
-
-        shipments["Delivered_Date"] = pd.to_datetime(delivered_dates)
-        shipments["On_Time"] = np.where(delivered_mask, shipments["Delivered_Date"] <= shipments["ETA"], np.nan)
+    if {"_Status_lc","ETA"}.issubset(shipments.columns):
+        eta_ns = shipments["ETA"].to_numpy(dtype="datetime64[ns]").view("i8")
+        delivered_ns, on_time = _simulate_delivery(eta_ns, shipments["_Status_lc"].eq("delivered").to_numpy())
+        shipments["Delivered_Date"] = delivered_ns.view("datetime64[ns]")
+        shipments["On_Time"] = on_time
     else:
         shipments["Delivered_Date"] = pd.NaT
         shipments["On_Time"] = np.nan
@@ -68,9 +151,8 @@ def load_data_from_uploads(up_ship, up_inv, up_wh, up_cli):
         shipments["Variance_%"] = shipments["Variance_%"].replace([np.inf, -np.inf], np.nan).round(1)
 
     if {"Origin_Port","Destination_Port"}.issubset(shipments.columns):
-        shipments["Route"] = shipments["Origin_Port"].astype(str) + " → " + shipments["Destination_Port"].astype(str)
+        shipments["Route"] = (shipments["Origin_Port"].astype(str) + " → " + shipments["Destination_Port"].astype(str)).astype("category")
 
-    today = pd.Timestamp(date.today())
     if "Paid_Status" in invoices.columns:
         invoices["Is_Outstanding"] = invoices["Paid_Status"].isin(["Unpaid","Overdue"])
     if "Due_Date" in invoices.columns:
@@ -78,6 +160,134 @@ def load_data_from_uploads(up_ship, up_inv, up_wh, up_cli):
 
     return shipments, invoices, warehouse, clients
 
+def load_data_from_uploads(up_ship, up_inv, up_wh, up_cli):
+    # today is part of the cache key, so overdue flags refresh when the date rolls over
+    return _enrich(*_load_raw(up_ship, up_inv, up_wh, up_cli), today=TODAY)
+
+BLANK_STATUS = "(blank)"  # status filter option for rows with no Status
+
+@st.cache_data
+def apply_filters(shipments, origins: tuple, dests: tuple, statuses: tuple, start, end) -> pd.DataFrame:
+    # empty selection = no filter on that column; start/end None = no ETA window.
+    # One NumPy mask is combined in place and the frame is sliced once.
+    m = np.ones(len(shipments), dtype=bool)
+    if origins and "Origin_Port" in shipments.columns:
+        m &= shipments["Origin_Port"].isin(origins).to_numpy()
+    if dests and "Destination_Port" in shipments.columns:
+        m &= shipments["Destination_Port"].isin(dests).to_numpy()
+    if statuses and "Status" in shipments.columns:
+        hit = shipments["Status"].isin(statuses).to_numpy(dtype=bool, na_value=False)
+        if BLANK_STATUS in statuses:
+            hit |= shipments["Status"].isna().to_numpy()
+        m &= hit
+    if start is not None and end is not None and "ETA" in shipments.columns:
+        eta_ns = shipments["ETA"].to_numpy(dtype="datetime64[ns]").view("i8")
+        m &= (eta_ns >= start.value) & (eta_ns < end.value)  # NaT is int64 min: excluded
+    return shipments if m.all() else shipments.loc[m]
+
+def narrowing(selected, options, column):
+    # a selection covering every option filters nothing, so pass () to skip the mask;
+    # blanks never match an option, so only when the column has none
+    if set(selected) >= set(options) and (column is None or column.notna().all()):
+        return ()
+    return tuple(selected)
+
+def public_cols(df):
+    # hide helper columns (leading underscore) from tables and exports
+    return [c for c in df.columns if not str(c).startswith("_")]
+
+PREVIEW_ROWS = 200  # rows sent to the browser per page of a full table
+
+def _load_more(key):
+    view, shown = st.session_state[key]
+    st.session_state[key] = (view, shown + PREVIEW_ROWS)
+
+def preview_table(df, key, view=None):
+    # serialize only the first rows; "Load more" extends the window by a page.
+    # The window is stored with the view it belongs to (default: the row count),
+    # so a new filter or upload starts again from the first page.
+    view = len(df) if view is None else view
+    stored_view, shown = st.session_state.get(key, (None, PREVIEW_ROWS))
+    if stored_view != view:
+        shown = PREVIEW_ROWS
+        st.session_state[key] = (view, shown)
+    st.dataframe(df.head(shown), use_container_width=True, column_order=public_cols(df))
+    st.caption(f"Showing {min(shown, len(df)):,} of {len(df):,} rows")
+    if shown < len(df):
+        st.button("Load more", key=f"{key}_more", on_click=_load_more, args=(key,))
+
+@st.cache_data
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    # serialized once per distinct frame, not on every rerun
+    return df.to_csv(index=False, columns=public_cols(df)).encode()
+
+# ---------- SHIPMENT VIEW AGGREGATES ----------
+# `_f` (the filtered frame) is not hashed; `view_key` identifies it cheaply
+# as (shipments source, filter selection), so unchanged views are cache hits.
+@st.cache_data
+def top_route_variance(_f, view_key, n=10):
+    # per-route means with np.add.reduceat over rows sorted by route code
+    codes = _f["Route"].cat.codes.to_numpy()
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]  # drop missing routes
+    if order.size == 0:
+        return pd.DataFrame(columns=["Route", "Cost_Variance", "Variance_%"])
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+
+    out = {"Route": _f["Route"].cat.categories[sorted_codes[starts]].to_numpy()}
+    for col in ["Cost_Variance", "Variance_%"]:
+        vals = _f[col].to_numpy(dtype=float)[order]
+        valid = ~np.isnan(vals)  # skip NaN like groupby().mean()
+        sums = np.add.reduceat(np.where(valid, vals, 0.0), starts)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[col] = sums / counts
+
+    top = np.argsort(-out["Cost_Variance"], kind="stable")[:n]  # NaN sorts last
+    return pd.DataFrame({col: vals[top] for col, vals in out.items()})
+
+@st.cache_data
+def top_overruns(_f, view_key, cols, n=5):
+    return _f.sort_values("Cost_Variance", ascending=False).head(n)[cols]
+
+@st.cache_data
+def eta_risk(_f, view_key, cutoff, cols, n=5):
+    upcoming = _f[(_f["ETA"] <= cutoff) & (~_f["_Status_lc"].isin(["delivered", "cleared"]))]
+    return upcoming.sort_values("ETA").head(n)[cols]
+
+# ---------- PLOT DOWNSAMPLING ----------
+MAX_PLOT_POINTS = 500  # per line series; more is indistinguishable on screen
+
+def lttb_indices(x, y, n_out=MAX_PLOT_POINTS):
+    # Largest-Triangle-Three-Buckets: row positions that keep the line's shape
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    buckets = np.array_split(np.arange(1, n - 1), n_out - 2)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i, bucket in enumerate(buckets):
+        nxt = buckets[i + 1] if i + 1 < len(buckets) else np.array([n - 1])
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((x[a] - avg_x) * (y[bucket] - y[a]) - (x[a] - x[bucket]) * (avg_y - y[a]))
+        a = bucket[np.argmax(area)]
+        idx[i + 1] = a
+    return idx
+
+def downsample(df, x_col, y_cols, n_out=MAX_PLOT_POINTS):
+    # dates are compared as int64 ns; any other x (e.g. container IDs) by position.
+    # Several y columns share one row set (sorted union of each column's picks),
+    # so traces plotted from the result line up on the same x values.
+    x = df[x_col]
+    x_num = x.to_numpy(dtype="datetime64[ns]").view("i8") if pd.api.types.is_datetime64_any_dtype(x) else np.arange(len(df))
+    y_cols = [y_cols] if isinstance(y_cols, str) else y_cols
+    idx = np.unique(np.concatenate([lttb_indices(x_num, df[col].to_numpy(dtype=float), n_out) for col in y_cols]))
+    return df.iloc[idx]
+
 # actually load the data (now that up_* vars exist)
 shipments, invoices, warehouse, clients = load_data_from_uploads(up_ship, up_inv, up_wh, up_cli)
 
@@ -92,9 +302,11 @@ with st.sidebar:
 
     # ---- PORT FILTERS ----
     if col_safe(shipments, "Origin_Port") and col_safe(shipments, "Destination_Port"):
-        ports = sorted(
-            set(shipments["Origin_Port"].astype(str).dropna())
-            | set(shipments["Destination_Port"].astype(str).dropna())
+        # ports are categorical: union the category tables instead of scanning rows
+        ports = (
+            shipments["Origin_Port"].cat.categories
+            .union(shipments["Destination_Port"].cat.categories)
+            .sort_values().tolist()
         )
     else:
         ports = []
@@ -106,7 +318,9 @@ with st.sidebar:
 
     # ---- STATUS FILTER ----
     if col_safe(shipments, "Status"):
-        statuses = sorted(shipments["Status"].astype(str).dropna().unique().tolist())
+        statuses = sorted(shipments["Status"].dropna().unique().tolist())
+        if shipments["Status"].isna().any():
+            statuses.append(BLANK_STATUS)  # keep blank-status rows selectable
     else:
         statuses = []
     sel_status = st.multiselect("Shipment Status", options=statuses, default=statuses, key="status_filter")
@@ -117,30 +331,36 @@ with st.sidebar:
             min_eta = pd.to_datetime(shipments["ETA"].min())
             max_eta = pd.to_datetime(shipments["ETA"].max())
         else:
-            min_eta = max_eta = pd.Timestamp.today()
+            min_eta = max_eta = TODAY
     else:
-        min_eta = max_eta = pd.Timestamp.today()
+        min_eta = max_eta = TODAY
 
     eta_range = st.date_input("ETA window", value=(min_eta.date(), max_eta.date()), key="eta_window")
 
     # ---- APPLY FILTERS ----
-    f = shipments.copy()
-    if len(sel_origin) and col_safe(f, "Origin_Port"):
-        f = f[f["Origin_Port"].astype(str).isin(sel_origin)]
-    if len(sel_dest) and col_safe(f, "Destination_Port"):
-        f = f[f["Destination_Port"].astype(str).isin(sel_dest)]
-    if len(sel_status) and col_safe(f, "Status"):
-        f = f[f["Status"].astype(str).isin(sel_status)]
-
-    if isinstance(eta_range, (list, tuple)) and len(eta_range) == 2 and col_safe(f, "ETA"):
+    start = end = None
+    if isinstance(eta_range, (list, tuple)) and len(eta_range) == 2:
         start = pd.Timestamp(eta_range[0])
         end   = pd.Timestamp(eta_range[1]) + pd.Timedelta(days=1)  # inclusive end
-        f = f[(f["ETA"] >= start) & (f["ETA"] < end)]
+        # a window covering every ETA only filters out blank ETAs (NaT never
+        # matches), so it can be skipped only when there are none
+        eta_complete = col_safe(shipments, "ETA") and shipments["ETA"].notna().all()
+        if eta_complete and start <= min_eta and end > max_eta:
+            start = end = None
+
+    filters = (
+        narrowing(sel_origin, ports, shipments.get("Origin_Port")),
+        narrowing(sel_dest, ports, shipments.get("Destination_Port")),
+        narrowing(sel_status, statuses, shipments.get("Status")),
+        start, end,
+    )
+    f = apply_filters(shipments, *filters)
+    view_key = (up_ship.file_id if up_ship else None, filters)
 
     st.divider()
     st.download_button(
         "Download filtered shipments (CSV)",
-        data=f.to_csv(index=False),
+        data=to_csv_bytes(f),
         file_name="filtered_shipments.csv",
         mime="text/csv"
     )
@@ -159,37 +379,45 @@ def kpi_row(df_s, df_i, df_w):
     # --- shipments ---
     total_ship = len(df_s)
     delayed = 0
-    if "Status" in df_s:
-        delayed = int(df_s["Status"].astype(str).str.lower().isin(["delayed","pending customs"]).sum())
+    if "_Status_lc" in df_s:
+        status_lc = df_s["_Status_lc"]
+        delayed_codes = np.flatnonzero(status_lc.cat.categories.isin(["delayed","pending customs"]))
+        delayed = int(np.isin(status_lc.cat.codes.to_numpy(), delayed_codes).sum())
     delayed_pct = (delayed / total_ship * 100) if total_ship else 0
 
     # --- costs ---
-    total_planned = float(df_s.get("Cost_Planned", pd.Series(dtype=float)).sum())
-    total_actual  = float(df_s.get("Cost_Actual", pd.Series(dtype=float)).sum())
+    # one sweep over both cost columns; a missing column counts as 0
+    cost_cols = [c for c in ["Cost_Planned", "Cost_Actual"] if c in df_s]
+    sums = dict(zip(cost_cols, np.nansum(df_s[cost_cols].to_numpy(dtype=float), axis=0)))
+    total_planned = float(sums.get("Cost_Planned", 0.0))
+    total_actual  = float(sums.get("Cost_Actual", 0.0))
     variance = total_actual - total_planned
     variance_pct = (variance / total_planned * 100) if total_planned else 0
 
     # --- invoices ---
     outstanding_amt = 0
     if not df_i.empty and "Amount" in df_i and "Is_Outstanding" in df_i:
-        outstanding_amt = float(df_i.loc[df_i["Is_Outstanding"], "Amount"].sum())
+        amt = df_i["Amount"].to_numpy(dtype=float)
+        out = df_i["Is_Outstanding"].to_numpy(dtype=bool)
+        outstanding_amt = float(np.nansum(amt[out]))
 
     paid_rate = 0
     if "Paid_Status" in df_i and len(df_i) > 0:
-        paid_rate = (df_i["Paid_Status"].eq("Paid").mean()) * 100
+        # blank statuses count as unpaid (nullable Arrow strings would otherwise skip them)
+        paid_rate = df_i["Paid_Status"].eq("Paid").to_numpy(dtype=bool, na_value=False).mean() * 100
 
     # --- warehouse ---
     on_hand = 0
     if "Outbound_Date" in df_w and "Quantity" in df_w:
-        today = pd.Timestamp(date.today())
-        on_hand = int(df_w.loc[df_w["Outbound_Date"] >= today, "Quantity"].sum())
+        on_hand = int(df_w.loc[df_w["Outbound_Date"] >= TODAY, "Quantity"].sum())
 
     # --- SLA ---
     sla = 0
-    if "Status" in df_s and "On_Time" in df_s:
-        delivered_only = df_s[df_s["Status"].astype(str).str.lower() == "delivered"]
-        if not delivered_only.empty:
-            sla = (delivered_only["On_Time"].mean() * 100)
+    if "_Status_lc" in df_s and "On_Time" in df_s:
+        # category-code compare + masked mean of one column; no filtered frame copy
+        delivered = (df_s["_Status_lc"] == "delivered").to_numpy()
+        if delivered.any():
+            sla = float(np.nanmean(df_s["On_Time"].to_numpy()[delivered])) * 100
 
     # --- display ---
     col1.metric("Total Shipments", f"{total_ship}")
@@ -200,8 +428,10 @@ def kpi_row(df_s, df_i, df_w):
     col6.metric("Outstanding $", f"${outstanding_amt:,.0f}")
     col7.metric("On-time SLA", f"{sla:.1f}%")
 
+    return {"delayed_pct": delayed_pct, "sla": sla}
+
 # render KPIs
-kpi_row(f, invoices, warehouse)
+kpis = kpi_row(f, invoices, warehouse)
 st.divider()
 
 # ---------- TABS ----------
@@ -210,7 +440,7 @@ tabs = st.tabs(["Shipments", "Finance / Invoices", "Warehouse", "Clients"])
 # ========== TAB 1: SHIPMENTS ==========
 with tabs[0]:
     st.subheader("Shipment Tracker (filtered)")
-    st.dataframe(f, use_container_width=True)
+    preview_table(f, "preview_shipments", view=view_key)
 
     left, right = st.columns([1, 1])
 
@@ -224,12 +454,14 @@ with tabs[0]:
     with right:
         if {"Cost_Planned", "Cost_Actual", "Container_ID"}.issubset(f.columns) and not f.empty:
             st.markdown("**Planned vs Actual (by Container)**")
-            fig_cost = px.line(
-                f.sort_values("Container_ID"),
-                x="Container_ID",
-                y=["Cost_Planned", "Cost_Actual"],
-                markers=True
-            )
+            cost_cols = ["Cost_Planned", "Cost_Actual"]
+            by_container = downsample(f.sort_values("Container_ID"), "Container_ID", cost_cols)
+            # blank IDs are pd.NA in the string column, which plotly cannot serialize
+            container_ids = by_container["Container_ID"].to_numpy(dtype=object, na_value=None)
+            fig_cost = go.Figure([
+                go.Scattergl(x=container_ids, y=by_container[col], name=col, mode="lines+markers")
+                for col in cost_cols
+            ])
             st.plotly_chart(fig_cost, use_container_width=True)
         else:
             st.info("Cost data not available for current filter.")
@@ -237,19 +469,16 @@ with tabs[0]:
     # Route variance chart
     if {"Route", "Variance_%", "Cost_Variance"}.issubset(f.columns) and not f.empty:
         st.markdown("**Top Cost Variance by Route**")
-        route_var = (
-            f.groupby("Route", as_index=False)[["Cost_Variance", "Variance_%"]]
-             .mean()
-             .sort_values("Cost_Variance", ascending=False)
-             .head(10)
-        )
+        route_var = top_route_variance(f, view_key)
         if not route_var.empty:
-            fig_route = px.bar(
-                route_var, x="Route", y="Cost_Variance", text="Variance_%",
-                title="Avg variance by route"
+            # small aggregate: Vega-Lite renders this without plotly's figure-build cost
+            bars = alt.Chart(route_var, title="Avg variance by route").mark_bar().encode(
+                x=alt.X("Route", sort="-y", axis=alt.Axis(labelAngle=-30)),
+                y="Cost_Variance",
+                tooltip=["Route", "Cost_Variance", "Variance_%"],
             )
-            fig_route.update_xaxes(tickangle=30)
-            st.plotly_chart(fig_route, use_container_width=True)
+            labels = bars.mark_text(dy=-6).encode(text="Variance_%")
+            st.altair_chart(bars + labels, use_container_width=True)
         else:
             st.info("No variance data to display.")
 
@@ -260,30 +489,25 @@ with tabs[0]:
     # Top 5 cost overruns
     with alerts_left:
         if "Cost_Variance" in f.columns and not f.empty:
-            overruns = f.sort_values("Cost_Variance", ascending=False).head(5)
             st.write("**Top Cost Overruns (by container)**")
             cols_to_show = [c for c in ["Container_ID", "Route", "Cost_Planned", "Cost_Actual", "Cost_Variance"] if c in f.columns]
-            st.dataframe(overruns[cols_to_show], use_container_width=True)
+            st.dataframe(top_overruns(f, view_key, cols_to_show), use_container_width=True)
         else:
             st.info("No overrun data for current filter.")
 
     # Shipments approaching ETA but not cleared/delivered
     with alerts_right:
-        if {"ETA", "Status"}.issubset(f.columns) and not f.empty:
-            upcoming = f[
-                (f["ETA"] <= pd.Timestamp.today() + pd.Timedelta(days=3)) &
-                (~f["Status"].astype(str).str.lower().isin(["delivered", "cleared"]))
-            ].sort_values("ETA").head(5)
+        if {"ETA", "_Status_lc"}.issubset(f.columns) and not f.empty:
             st.write("**ETA ≤ 3 days & not cleared/delivered**")
             cols_to_show = [c for c in ["Container_ID", "Route", "ETA", "Status"] if c in f.columns]
-            st.dataframe(upcoming[cols_to_show], use_container_width=True)
+            st.dataframe(eta_risk(f, view_key, TODAY_PLUS_3, cols_to_show), use_container_width=True)
         else:
             st.info("No ETA risk items for current filter.")
 
 # ========== FINANCE / INVOICES ==========
 with tabs[1]:
     st.subheader("Invoice Overview")
-    st.dataframe(invoices, use_container_width=True)
+    preview_table(invoices, "preview_invoices")
 
     c1, c2 = st.columns(2)
 
@@ -318,7 +542,7 @@ with tabs[1]:
     if not outstanding.empty:
         st.download_button(
             "Download outstanding invoices (CSV)",
-            outstanding.to_csv(index=False),
+            to_csv_bytes(outstanding),
             "outstanding_invoices.csv",
             "text/csv"
         )
@@ -326,7 +550,7 @@ with tabs[1]:
 # ========== WAREHOUSE ==========
 with tabs[2]:
     st.subheader("Inbound / Outbound Register")
-    st.dataframe(warehouse, use_container_width=True)
+    preview_table(warehouse, "preview_warehouse")
 
     # Safety flags
     has_inbound = {"Inbound_Date", "Quantity"}.issubset(warehouse.columns)
@@ -336,9 +560,14 @@ with tabs[2]:
     # Inbound trend
     if has_inbound and not warehouse.empty:
         st.markdown("**Inbound Quantity Over Time**")
-        wh_in = warehouse.dropna(subset=["Inbound_Date"]).sort_values("Inbound_Date")
+        # one point per day: sum inbound quantity before handing it to plotly
+        wh_in = (
+            warehouse.dropna(subset=["Inbound_Date"])
+            .groupby("Inbound_Date", as_index=False)["Quantity"].sum()
+        )
         if not wh_in.empty:
-            fig_in = px.line(wh_in, x="Inbound_Date", y="Quantity")
+            wh_in = downsample(wh_in, "Inbound_Date", "Quantity")
+            fig_in = go.Figure([go.Scattergl(x=wh_in["Inbound_Date"], y=wh_in["Quantity"], mode="lines")])
             st.plotly_chart(fig_in, use_container_width=True)
         else:
             st.info("No inbound dates available.")
@@ -353,8 +582,13 @@ with tabs[2]:
             .sum().sort_values("Quantity", ascending=False)
         )
         if not loc.empty:
-            fig_loc = px.bar(loc, x="Location", y="Quantity")
-            st.plotly_chart(fig_loc, use_container_width=True)
+            # largest first; st.bar_chart would re-sort locations alphabetically
+            loc_chart = alt.Chart(loc).mark_bar().encode(
+                x=alt.X("Location", sort="-y"),
+                y="Quantity",
+                tooltip=["Location", "Quantity"],
+            )
+            st.altair_chart(loc_chart, use_container_width=True)
         else:
             st.info("No location data to summarize.")
     else:
@@ -362,19 +596,18 @@ with tabs[2]:
 
     # On-hand now
     if has_outbound and "Quantity" in warehouse.columns:
-        today = pd.Timestamp(date.today())
-        on_hand_now = warehouse.loc[warehouse["Outbound_Date"] >= today, "Quantity"].sum()
+        on_hand_now = warehouse.loc[warehouse["Outbound_Date"] >= TODAY, "Quantity"].sum()
         st.caption(f"**Inventory on hand (today):** {int(on_hand_now):,}")
 
 # ========== CLIENTS ==========
 with tabs[3]:
     st.subheader("Client Pickups & Deliveries")
-    st.dataframe(clients, use_container_width=True)
+    preview_table(clients, "preview_clients")
 
     # Delivery status mix
     if "Status" in clients.columns and not clients.empty:
         st.markdown("**Delivery Status Mix**")
-        st.bar_chart(clients["Status"].astype(str).value_counts())
+        st.bar_chart(clients["Status"].value_counts())
     else:
         st.info("No client status data available.")
 
@@ -382,8 +615,8 @@ with tabs[3]:
     if "Pickup_Date" in clients.columns and not clients.empty:
         st.markdown("**Upcoming Pickups (≤ 7 days)**")
         upcoming_pickups = clients[
-            (clients["Pickup_Date"] >= pd.Timestamp(date.today())) &
-            (clients["Pickup_Date"] <= pd.Timestamp(date.today()) + pd.Timedelta(days=7))
+            (clients["Pickup_Date"] >= TODAY) &
+            (clients["Pickup_Date"] <= TODAY_PLUS_7)
         ].sort_values("Pickup_Date").head(10)
         if not upcoming_pickups.empty:
             cols_show = [c for c in ["Client_ID","Name","Pickup_Date","Delivery_Address","Status"] if c in clients.columns]
@@ -402,8 +635,7 @@ elif role == "Service":
 else:
     st.caption("Tip: Use the sidebar filters to narrow by origin/destination, status, and ETA window.")
 
-# Dynamic hint based on current filter
-if "Status" in f.columns and len(f) > 0:
-    delayed_pct = (f["Status"].astype(str).str.lower().isin(["delayed", "pending customs"]).mean()) * 100
-    if delayed_pct >= 20:
-        st.warning(f"High delay rate in current view: {delayed_pct:.1f}% — check **Shipments → Alerts** for ETA-at-risk.")
\ No newline at end of file
+# Dynamic hint based on current filter (delay rate already computed for the KPI strip)
+delayed_pct = kpis["delayed_pct"]
+if delayed_pct >= 20:
+    st.warning(f"High delay rate in current view: {delayed_pct:.1f}% — check **Shipments → Alerts** for ETA-at-risk.")
\ No newline at end of file